@@ -1,8 +1,18 @@
 import os
+import re
 import sys
+import csv
 import json
+import hashlib
+import queue
+import argparse
 import threading
+import time
 import webbrowser
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 import fitz 
 import tkinter as tk
@@ -42,39 +52,61 @@ USER_PHOTO_FILES = [
 # ----------------------------------------------------------------------
 # BUILT-IN REDACTION TERMS
 # ----------------------------------------------------------------------
+BUILTIN_TERMS_BY_LANGUAGE = {
+    "en": [
+        "Name", "Last Name", "Family Name","First Name", "Middle Name", "Address", "Street Address",
+        "City", "State", "Zip", "County", "Date of Birth", "birthdate", "DOB",
+        "Age", "Date of Admission", "Admission Date", "Date of Discharge",
+        "Discharge Date", "Date of Death", "Date Measured", "Telephone Number", "Phone", "Telephone",
+        "Fax Number", "Fax", "Email Address", "Email", "Social Security Number", "SSN",
+        "Medical Record Number", "MRN", "Patient ID", "Patient Number",
+        "Health Plan Beneficiary Number", "Member ID", "Insurance ID", "Insurance Number", "Health Insurance", "Account Number",
+        "Certificate/License Number", "Vehicle Identifier", "License Plate",
+        "Device Identifier", "Serial Number", "Sex", "Gender", "Attending Physician",
+        "Referring Physician",
+    ],
+    "de": [
+        "Nachname", "Vorname", "Adresse", "Straße", "Stadt", "Ort", "Land",
+        "PLZ", "Postleitzahl", "Geburtsdatum", "Geburtstag", "Geb.", "Alter",
+        "Aufnahmedatum", "Entlassungsdatum", "Todesdatum", "Messdatum",
+        "Telefonnummer", "Tel", "Faxnummer", "E-Mail", "Sozialversicherungsnummer",
+        "SV-Nummer", "Patienten-ID", "Patientennummer", "Krankenversicherungsnummer",
+        "Versichertennummer", "Kontonummer", "Lizenznummer", "Fahrzeug-ID",
+        "Kennzeichen", "Geräte-ID", "Seriennummer", "Geschlecht",
+        "Behandelnder Arzt", "Überweisender Arzt", "Arzt", "Klinik", "Krankenhaus",
+    ],
+    "fr": [
+        "Nom", "Nom de naissance", "Nom de famille", "Prénom", "Adresse", "Rue",
+        "Ville", "Code Postal", "Date de naissance", "Né(e) le", "Âge",
+        "Date d'admission", "Date d'entrée", "Date de sortie", "Date de décès",
+        "Date de la mesure", "Numéro de téléphone", "Tél", "Numéro de fax",
+        "Adresse e-mail", "Courriel", "Numéro de Sécurité Sociale", "N° SS",
+        "Numéro de dossier patient", "N° Dossier", "ID Patient",
+        "Numéro d'assurance maladie", "Numéro de compte", "Numéro de licence",
+        "Plaque d'immatriculation", "Numéro de série", "Identifiant de l'appareil",
+        "Sexe", "Genre", "Médecin traitant", "Médecin référent",
+    ],
+}
+
 KEY_VALUE_PAIRS = [
-    # English
-    "Name", "Last Name", "Family Name","First Name", "Middle Name", "Address", "Street Address",
-    "City", "State", "Zip", "County", "Date of Birth", "birthdate", "DOB",
-    "Age", "Date of Admission", "Admission Date", "Date of Discharge",
-    "Discharge Date", "Date of Death", "Date Measured", "Telephone Number", "Phone", "Telephone",
-    "Fax Number", "Fax", "Email Address", "Email", "Social Security Number", "SSN",
-    "Medical Record Number", "MRN", "Patient ID", "Patient Number",
-    "Health Plan Beneficiary Number", "Member ID", "Insurance ID", "Insurance Number", "Health Insurance", "Account Number",
-    "Certificate/License Number", "Vehicle Identifier", "License Plate",
-    "Device Identifier", "Serial Number", "Sex", "Gender", "Attending Physician",
-    "Referring Physician",
-    # Deutsch
-    "Nachname", "Vorname", "Adresse", "Straße", "Stadt", "Ort", "Land",
-    "PLZ", "Postleitzahl", "Geburtsdatum", "Geburtstag", "Geb.", "Alter",
-    "Aufnahmedatum", "Entlassungsdatum", "Todesdatum", "Messdatum",
-    "Telefonnummer", "Tel", "Faxnummer", "E-Mail", "Sozialversicherungsnummer",
-    "SV-Nummer", "Patienten-ID", "Patientennummer", "Krankenversicherungsnummer",
-    "Versichertennummer", "Kontonummer", "Lizenznummer", "Fahrzeug-ID",
-    "Kennzeichen", "Geräte-ID", "Seriennummer", "Geschlecht",
-    "Behandelnder Arzt", "Überweisender Arzt", "Arzt", "Klinik", "Krankenhaus",
-    # Français
-    "Nom", "Nom de naissance", "Nom de famille", "Prénom", "Adresse", "Rue",
-    "Ville", "Code Postal", "Date de naissance", "Né(e) le", "Âge",
-    "Date d'admission", "Date d'entrée", "Date de sortie", "Date de décès",
-    "Date de la mesure", "Numéro de téléphone", "Tél", "Numéro de fax",
-    "Adresse e-mail", "Courriel", "Numéro de Sécurité Sociale", "N° SS",
-    "Numéro de dossier patient", "N° Dossier", "ID Patient",
-    "Numéro d'assurance maladie", "Numéro de compte", "Numéro de licence",
-    "Plaque d'immatriculation", "Numéro de série", "Identifiant de l'appareil",
-    "Sexe", "Genre", "Médecin traitant", "Médecin référent",
+    term for terms in BUILTIN_TERMS_BY_LANGUAGE.values() for term in terms
 ]
 
+# Language-neutral terms are matched in every document regardless of the
+# detected language. Terms listed under several languages (e.g. "Adresse")
+# are neutral as well, and so are user terms without a language tag.
+NEUTRAL_LANGUAGE = "neutral"
+
+NEUTRAL_TERMS = ["DOB", "MRN", "SSN", "Fax", "Email", "E-Mail", "Tel"]
+
+TERM_LANGUAGES = {}
+for _language, _terms in BUILTIN_TERMS_BY_LANGUAGE.items():
+    for _term in _terms:
+        if TERM_LANGUAGES.setdefault(_term, _language) != _language:
+            TERM_LANGUAGES[_term] = NEUTRAL_LANGUAGE
+for _term in NEUTRAL_TERMS:
+    TERM_LANGUAGES[_term] = NEUTRAL_LANGUAGE
+
 
 # ----------------------------------------------------------------------
 # FILE LOADERS
@@ -107,6 +139,1452 @@ LICENSE_TEXT = load_first_existing(
     "LICENSE.txt not found.",
 )
 
+# ----------------------------------------------------------------------
+# REDACTION ENGINE
+# ----------------------------------------------------------------------
+
+REDACT_MARGIN = 0.5
+
+# How apply_redactions() treats images and vector graphics under each
+# redaction mode:
+#   images:   "ignore" (never touched), "pixels" (blank the covered pixels),
+#             "remove" (drop every image touched by a redaction)
+#   graphics: "ignore", "covered" (remove fully covered line art),
+#             "touched" (remove any line art touched by a redaction)
+# Images are only processed on pages where a redaction actually overlaps
+# one, so text-only pages always take the fast path. Line art fully under a
+# redaction box is always removed, as with PyMuPDF's own default.
+REDACTION_POLICIES = {
+    "standard": {"images": "pixels", "graphics": "covered"},
+    "aggressive": {"images": "pixels", "graphics": "covered"},
+}
+
+IMAGE_POLICY_FLAGS = {
+    "ignore": fitz.PDF_REDACT_IMAGE_NONE,
+    "pixels": fitz.PDF_REDACT_IMAGE_PIXELS,
+    "remove": fitz.PDF_REDACT_IMAGE_REMOVE,
+}
+
+GRAPHICS_POLICY_FLAGS = {
+    "ignore": fitz.PDF_REDACT_LINE_ART_NONE,
+    "covered": fitz.PDF_REDACT_LINE_ART_REMOVE_IF_COVERED,
+    "touched": fitz.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED,
+}
+
+# Pages checked by the "sampled" verification mode (first, last and evenly
+# spaced pages in between). "full" checks every page.
+VERIFY_SAMPLE_PAGES = 8
+
+
+# Language guess: stop words counted on the first pages of a document.
+# Languages scoring at least LANGUAGE_SHARE of the best score are kept; with
+# fewer than LANGUAGE_MIN_EVIDENCE stop words every language stays active.
+# A term written as a label ("Geburtsdatum:") also keeps its language active,
+# so bilingual forms are not narrowed to the language of the prose.
+LANGUAGE_STOPWORDS = {
+    "en": {"the", "and", "of", "with", "for", "was", "is", "are", "to", "on",
+           "at", "by", "this", "from", "were", "has", "not"},
+    "de": {"der", "die", "das", "und", "mit", "nicht", "ist", "von", "für",
+           "bei", "im", "dem", "den", "ein", "eine", "wurde", "zu", "auf"},
+    "fr": {"le", "la", "les", "et", "du", "est", "pour", "avec", "dans",
+           "une", "au", "aux", "sur", "par", "été", "de", "des"},
+}
+LANGUAGE_SAMPLE_PAGES = 2
+LANGUAGE_MIN_EVIDENCE = 8
+LANGUAGE_SHARE = 0.25
+
+
+def detect_languages(doc, label_languages=None):
+    # label_languages: {lowercase single term: language}
+    label_languages = label_languages or {}
+    scores = {language: 0 for language in LANGUAGE_STOPWORDS}
+    labelled = set()
+    for page_index in range(min(len(doc), LANGUAGE_SAMPLE_PAGES)):
+        for w in doc[page_index].get_text("words") or []:
+            text = w[4]
+            token = text.strip(".,:;()").lower()
+            for language, stopwords in LANGUAGE_STOPWORDS.items():
+                if token in stopwords:
+                    scores[language] += 1
+            if text.endswith(":") and token in label_languages:
+                labelled.add(label_languages[token])
+    best = max(scores.values())
+    if sum(scores.values()) < LANGUAGE_MIN_EVIDENCE:
+        return None
+    detected = {lang for lang, score in scores.items() if score >= best * LANGUAGE_SHARE}
+    return detected | (labelled - {NEUTRAL_LANGUAGE})
+
+
+# Maximum number of distinct text blocks remembered by a matcher's block
+# cache. The cache outlives a document, so besides repeated headers and
+# footers it learns the static blocks of recurring report templates (lab and
+# discharge forms): identical text at identical coordinates is matched once
+# per batch worker or GUI session instead of once per document.
+BLOCK_CACHE_SIZE = 4096
+
+
+class LRUCache:
+    # Bounded mapping with hit statistics. Used as the matcher's block cache
+    # (block fingerprint -> hits) and the preview pixmap cache.
+    def __init__(self, max_entries=BLOCK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+
+    def get(self, key):
+        self.lookups += 1
+        found = self.entries.get(key)
+        if found is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return found
+
+    def put(self, key, value):
+        # Returns the evicted (key, value) pair, if any.
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            return self.entries.popitem(last=False)
+        return None
+
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+def block_bbox(block_words):
+    return fitz.Rect(
+        min(w[0] for w in block_words),
+        min(w[1] for w in block_words),
+        max(w[2] for w in block_words),
+        max(w[3] for w in block_words),
+    )
+
+
+def block_fingerprint(block_words, bbox):
+    text = "\x1f".join(w[4] for w in block_words)
+    return (
+        round(bbox.x0, 1), round(bbox.y0, 1),
+        round(bbox.x1, 1), round(bbox.y1, 1),
+        text,
+    )
+
+
+# Words are split at separators other than hyphens, dots and apostrophes
+# ("Birth/DOB:" -> "birth", "dob"); pieces lose surrounding punctuation
+# ("(Date" -> "date", "ID#" -> "id").
+_TOKEN_SEPARATORS = re.compile(r"[^\w.\-'’]+")
+_EDGE_PUNCTUATION = re.compile(r"^[\W_]+|[\W_]+$")
+
+
+def _norm_token(text):
+    return _EDGE_PUNCTUATION.sub("", text).replace("’", "'").lower()
+
+
+def word_pieces(text):
+    pieces = (_norm_token(p) for p in _TOKEN_SEPARATORS.split(text))
+    return [p for p in pieces if p]
+
+
+def stream_tokens(block_words, join_hyphens=True):
+    # The block's ordered word stream as [(forms, word indices)]. A word
+    # ending in "-" at the end of a line is joined with the first word of the
+    # next line; forms then holds the de-hyphenated and the hyphenated
+    # spelling ("Medical", "Patienten-ID").
+    tokens = []
+    i = 0
+    while i < len(block_words):
+        text = block_words[i][4]
+        pieces = word_pieces(text)
+        if (
+            join_hyphens
+            and len(text) > 1
+            and text.endswith("-")
+            and i + 1 < len(block_words)
+            and block_words[i + 1][6] != block_words[i][6]
+        ):
+            following = word_pieces(block_words[i + 1][4])
+            if pieces and following:
+                tokens.extend(((p,), (i,)) for p in pieces[:-1])
+                forms = (
+                    pieces[-1] + following[0],
+                    pieces[-1] + "-" + following[0],
+                )
+                tokens.append((forms, (i, i + 1)))
+                tokens.extend(((p,), (i + 1,)) for p in following[1:])
+                i += 2
+                continue
+        tokens.extend(((p,), (i,)) for p in pieces)
+        i += 1
+    return tokens
+
+
+def line_rects(block_words, indices):
+    # One rectangle per text line covered by the given words.
+    rects = {}
+    for i in indices:
+        x0, y0, x1, y1 = block_words[i][:4]
+        line = block_words[i][6]
+        if line in rects:
+            rects[line] |= fitz.Rect(x0, y0, x1, y1)
+        else:
+            rects[line] = fitz.Rect(x0, y0, x1, y1)
+    return list(rects.values())
+
+
+def _trie_pattern(terms):
+    trie = {}
+    for term in terms:
+        node = trie
+        for token in re.findall(r"\s+|.", term.lower()):
+            node = node.setdefault(" " if token.isspace() else token, {})
+        node[""] = {}
+
+    def build(node):
+        alternatives = []
+        for key in sorted(node):
+            if key:
+                piece = r"[^\S\r\n]+" if key == " " else re.escape(key)
+                alternatives.append(piece + build(node[key]))
+        if not alternatives:
+            return ""
+        body = alternatives[0]
+        if len(alternatives) > 1:
+            body = "(?:" + "|".join(alternatives) + ")"
+        # Greedy optional group: longer terms are tried before a shorter
+        # term that ends here.
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class TermMatcher:
+    def __init__(self, terms, languages=None, detect_language=True):
+        # languages: {term: language} tags from the terms store; untagged
+        # terms fall back to TERM_LANGUAGES, then to the neutral bucket.
+        all_terms = [t.strip() for t in terms if t.strip()]
+        self.terms = all_terms
+        self.languages = dict(languages or {})
+        self.detect_language = detect_language
+        self._narrowed = {}
+        self.block_cache = LRUCache(BLOCK_CACHE_SIZE)
+        self._text_pattern = None
+        # Terms are tokenized like the page text. One-token terms are looked
+        # up directly, longer ones are indexed by their first token.
+        self.single_terms = {}
+        self.phrase_index = {}
+        for term in all_terms:
+            term_tokens = tuple(p for t in term.split() for p in word_pieces(t))
+            if len(term_tokens) == 1:
+                self.single_terms[term_tokens[0]] = term
+            elif term_tokens:
+                self.phrase_index.setdefault(term_tokens[0], []).append(
+                    (term_tokens, term)
+                )
+
+    def text_pattern(self):
+        # The term list compiled into one case-insensitive regular expression
+        # for text exports. Terms are merged into a prefix tree so the regex
+        # engine shares work between terms with a common start; whitespace
+        # inside phrases matches any run of spaces or tabs within a line.
+        if self._text_pattern is None:
+            body = _trie_pattern(self.terms)
+            if body:
+                self._text_pattern = re.compile(
+                    r"(?<!\w)(?:" + body + r")(?!\w)", re.IGNORECASE
+                )
+            else:
+                self._text_pattern = re.compile(r"(?!)")
+        return self._text_pattern
+
+    def text_scan_body(self):
+        # text_pattern() for lowercased text, without IGNORECASE and without
+        # the leading (?<!\w): both keep the regex engine from using its
+        # fast scan for possible first characters. The caller checks the
+        # word boundary before each match instead (see TextRedactor.redact).
+        body = _trie_pattern(self.terms)
+        return r"(?:" + body + r")(?!\w)" if body else r"(?!)"
+
+    def language_of(self, term):
+        return self.languages.get(term) or TERM_LANGUAGES.get(term, NEUTRAL_LANGUAGE)
+
+    def for_languages(self, active):
+        key = frozenset(active)
+        if key not in self._narrowed:
+            terms = [
+                t for t in self.terms
+                if self.language_of(t) in key
+                or self.language_of(t) == NEUTRAL_LANGUAGE
+            ]
+            self._narrowed[key] = TermMatcher(
+                terms, self.languages, detect_language=False
+            )
+        return self._narrowed[key]
+
+    def for_document(self, doc):
+        # Returns (matcher, detected languages or None).
+        if not self.detect_language:
+            return self, None
+        detected = detect_languages(doc, {
+            key: self.language_of(term) for key, term in self.single_terms.items()
+        })
+        if not detected:
+            return self, None
+        return self.for_languages(detected), detected
+
+    def find(self, page, words=None, cache=None):
+        if words is None:
+            words = page.get_text("words") or []
+        blocks = {}
+        for w in words:
+            blocks.setdefault(w[5], []).append(w)
+
+        hits = []
+        for block_words in blocks.values():
+            bbox = block_bbox(block_words)
+            key = None
+            if cache is not None:
+                key = block_fingerprint(block_words, bbox)
+                cached = cache.get(key)
+                if cached is not None:
+                    hits.extend(cached)
+                    continue
+            block_hits = self.find_in_block(block_words)
+            if cache is not None:
+                cache.put(key, block_hits)
+            hits.extend(block_hits)
+        return hits
+
+    def find_in_block(self, block_words):
+        # A hyphen join is only one reading of a line break ("Follow-" /
+        # "Name:" are two words), so the plain word stream is matched as well
+        # and hits found by both readings are reported once.
+        tokens = stream_tokens(block_words)
+        streams = [tokens]
+        if any(len(indices) > 1 for _forms, indices in tokens):
+            streams.append(stream_tokens(block_words, join_hyphens=False))
+
+        hits = []
+        seen = set()
+        for stream in streams:
+            for forms, indices in stream:
+                for form in forms:
+                    if form in self.single_terms:
+                        term = self.single_terms[form]
+                        for i in indices:
+                            if (term, i) in seen:
+                                continue
+                            seen.add((term, i))
+                            x0, y0, x1, y1 = block_words[i][:4]
+                            rect = fitz.Rect(
+                                x0 - REDACT_MARGIN,
+                                y0 - REDACT_MARGIN,
+                                x1 + REDACT_MARGIN,
+                                y1 + REDACT_MARGIN,
+                            )
+                            hits.append((term, rect))
+                        break
+        for stream in streams:
+            for phrase, rect in self.match_phrases(block_words, stream):
+                if (phrase, tuple(rect)) not in seen:
+                    seen.add((phrase, tuple(rect)))
+                    hits.append((phrase, rect))
+        return hits
+
+    def match_phrases(self, block_words, tokens):
+        # Single pass over the word stream: line breaks are ordinary token
+        # boundaries, so wrapped labels match, and each hit maps back to one
+        # rectangle per line it spans.
+        hits = []
+        for i, (forms, _indices) in enumerate(tokens):
+            for form in forms:
+                for phrase_tokens, phrase in self.phrase_index.get(form, ()):
+                    end = i + len(phrase_tokens)
+                    if end > len(tokens):
+                        continue
+                    if all(
+                        phrase_tokens[k] in tokens[i + k][0]
+                        for k in range(1, len(phrase_tokens))
+                    ):
+                        indices = [j for _f, idx in tokens[i:end] for j in idx]
+                        for rect in line_rects(block_words, indices):
+                            hits.append((phrase, rect))
+        return hits
+
+
+def add_redactions(page, hits, mode):
+    rects = []
+    for _term, rect in hits:
+        page.add_redact_annot(rect, text="[REDACTED]", fill=(0, 0, 0))
+        rects.append(rect)
+        if mode == "aggressive":
+            right = fitz.Rect(rect.x1, rect.y0 - 2,
+                              rect.x1 + 150, rect.y1 + 2)
+            page.add_redact_annot(right, text=" ", fill=(0, 0, 0))
+            below = fitz.Rect(rect.x0 - 10, rect.y1,
+                              rect.x1 + 150, rect.y1 + 20)
+            page.add_redact_annot(below, text=" ", fill=(0, 0, 0))
+            rects.extend((right, below))
+    return rects
+
+
+def overlaps_image(page, rects):
+    if not rects:
+        return False
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"])
+        if any(bbox.intersects(r) for r in rects):
+            return True
+    return False
+
+
+def apply_page_redactions(page, rects, policy):
+    image_policy = policy.get("images", "pixels")
+    if image_policy != "ignore" and not overlaps_image(page, rects):
+        image_policy = "ignore"
+    page.apply_redactions(
+        images=IMAGE_POLICY_FLAGS[image_policy],
+        graphics=GRAPHICS_POLICY_FLAGS[policy.get("graphics", "covered")],
+    )
+    return image_policy
+
+
+def redact_document(doc, matcher, mode, on_page=None, policy=None):
+    # Returns per-page statistics:
+    # [{"page", "words", "hits", "terms", "term_languages", "blocks",
+    #   "cached_blocks", "images", "seconds"}, ...]
+    if policy is None:
+        policy = REDACTION_POLICIES.get(mode, REDACTION_POLICIES["standard"])
+    cache = matcher.block_cache
+    page_stats = []
+    total_pages = len(doc)
+    for page_index, page in enumerate(doc):
+        if on_page is not None:
+            on_page(page_index, total_pages)
+        started = time.perf_counter()
+        words = page.get_text("words") or []
+        lookups, cached = cache.lookups, cache.hits
+        hits = matcher.find(page, words, cache)
+        rects = add_redactions(page, hits, mode)
+        image_policy = apply_page_redactions(page, rects, policy)
+        terms = {}
+        for term, _rect in hits:
+            terms[term] = terms.get(term, 0) + 1
+        page_stats.append({
+            "page": page_index + 1,
+            "words": len(words),
+            "hits": len(hits),
+            "terms": terms,
+            "term_languages": {term: matcher.language_of(term) for term in terms},
+            "blocks": cache.lookups - lookups,
+            "cached_blocks": cache.hits - cached,
+            "images": image_policy,
+            "seconds": time.perf_counter() - started,
+        })
+    return page_stats
+
+
+def format_timing_summary(page_stats):
+    if not page_stats:
+        return "No pages processed."
+    total = sum(s["seconds"] for s in page_stats)
+    slowest = max(page_stats, key=lambda s: s["seconds"])
+    image_pages = sum(1 for s in page_stats if s["images"] != "ignore")
+    blocks = sum(s["blocks"] for s in page_stats)
+    cached = sum(s["cached_blocks"] for s in page_stats)
+    hit_rate = cached / blocks if blocks else 0.0
+    return (
+        f"{len(page_stats)} page(s) in {total:.2f} s, "
+        f"slowest page {slowest['page']} ({slowest['seconds']:.2f} s), "
+        f"{image_pages} page(s) with image redaction, "
+        f"{hit_rate:.0%} of text blocks reused from earlier pages or documents."
+    )
+
+
+def open_document(source):
+    # Accepts a path, bytes/bytearray/memoryview or a binary file-like
+    # object. Paths are read into memory first so the source file is never
+    # kept open or locked by fitz (re-run bug). In-memory sources are handed
+    # to fitz without a copy; a BytesIO cannot be resized while its buffer
+    # is open in a document.
+    if isinstance(source, memoryview) and not source.contiguous:
+        source = source.tobytes()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    if hasattr(source, "getbuffer"):
+        return fitz.open(stream=source.getbuffer(), filetype="pdf")
+    if hasattr(source, "read"):
+        return fitz.open(stream=source.read(), filetype="pdf")
+    with open(source, "rb") as f:
+        file_data = f.read()
+    return fitz.open(stream=file_data, filetype="pdf")
+
+
+def save_document(doc, target=None):
+    # None returns the PDF as bytes, a file-like object is written to
+    # directly, anything else is treated as an output path. fitz needs to
+    # seek in the file it saves to, so pipes and sockets get the bytes.
+    if target is None:
+        return doc.tobytes()
+    if hasattr(target, "write") and not (
+        hasattr(target, "seekable") and target.seekable()
+    ):
+        target.write(doc.tobytes())
+        return None
+    doc.save(target)
+    return None
+
+
+def anonymize_document(source, terms, mode="standard", target=None,
+                       verify_mode="sampled", on_page=None, policy=None):
+    matcher = terms if isinstance(terms, TermMatcher) else TermMatcher(terms)
+    doc = open_document(source)
+    try:
+        narrowed, detected = matcher.for_document(doc)
+        page_stats = redact_document(doc, narrowed, mode, on_page, policy)
+        report = verify_redactions(doc, matcher, verify_mode, narrowed)
+        data = save_document(doc, target)
+    finally:
+        doc.close()
+    return {
+        "data": data,
+        "pages": page_stats,
+        "leaks": report["leaks"],
+        "other_language": report["other_language"],
+        "unverifiable": report["unverifiable"],
+        "languages": sorted(detected) if detected else None,
+    }
+
+
+def format_languages(detected):
+    if not detected:
+        return "all languages"
+    return ", ".join(sorted(detected))
+
+
+def verification_pages(total_pages, verify_mode):
+    if verify_mode == "full" or total_pages <= VERIFY_SAMPLE_PAGES:
+        return list(range(total_pages))
+    step = (total_pages - 1) / (VERIFY_SAMPLE_PAGES - 1)
+    return sorted({round(i * step) for i in range(VERIFY_SAMPLE_PAGES)})
+
+
+def verify_redactions(doc, matcher, verify_mode="sampled", narrowed=None):
+    # Re-extracts text from the already redacted, still open document and
+    # runs the full matcher over it. With `narrowed`, the language-narrowed
+    # matcher the document was redacted with, terms it left out on purpose
+    # are reported as "other_language" instead of as leaks. Checked pages
+    # without extractable text (scans) are listed as "unverifiable".
+    # Returns {"leaks": {page_number: [terms]}, "other_language": {...},
+    # "unverifiable": [page_number, ...]}.
+    report = {"leaks": {}, "other_language": {}, "unverifiable": []}
+    if verify_mode == "off":
+        return report
+    active = set(narrowed.terms) if narrowed is not None else None
+    for page_index in verification_pages(len(doc), verify_mode):
+        page = doc[page_index]
+        words = page.get_text("words") or []
+        if not words:
+            report["unverifiable"].append(page_index + 1)
+            continue
+        terms = sorted({term for term, _rect in matcher.find(page, words)})
+        leaked = [t for t in terms if active is None or t in active]
+        other = [t for t in terms if active is not None and t not in active]
+        if leaked:
+            report["leaks"][page_index + 1] = leaked
+        if other:
+            report["other_language"][page_index + 1] = other
+    return report
+
+
+def format_leak_report(leaks, max_pages=15, unverifiable=()):
+    entries = {page_number: ", ".join(terms) for page_number, terms in leaks.items()}
+    for page_number in unverifiable:
+        entries[page_number] = "not verifiable (no extractable text)"
+    lines = []
+    for page_number in sorted(entries)[:max_pages]:
+        lines.append(f"Page {page_number}: {entries[page_number]}")
+    if len(entries) > max_pages:
+        lines.append(f"… and {len(entries) - max_pages} more page(s).")
+    return "\n".join(lines)
+
+# ----------------------------------------------------------------------
+# TEXT EXPORTS (plain text, CSV, HL7)
+# ----------------------------------------------------------------------
+
+REDACTED_TEXT = "[REDACTED]"
+
+STREAM_BUFFER_SIZE = 1 << 20
+# Lines longer than this are processed in pieces so memory stays bounded.
+STREAM_LINE_LIMIT = 1 << 20
+
+TEXT_EXPORT_FORMATS = {
+    ".txt": "text",
+    ".log": "text",
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".psv": "psv",
+    ".hl7": "hl7",
+}
+
+# Formats read as tables with a header row.
+TABLE_DELIMITERS = {"csv": ",", "tsv": "\t", "psv": "|"}
+
+
+def text_export_format(path):
+    return TEXT_EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+class TextRedactor:
+    # Standard mode replaces each term with [REDACTED]. Enhanced mode also
+    # replaces the rest of the field (HL7: up to the next "|") or line, the
+    # text equivalent of the contextual area redacted in PDFs.
+    def __init__(self, matcher, mode="standard", field_delimiter=None):
+        self.label_pattern = matcher.text_pattern()
+        self.value_pattern = None
+        self.pattern = self.label_pattern
+        scan = matcher.text_scan_body()
+        if mode == "aggressive":
+            stop = re.escape(field_delimiter) if field_delimiter else ""
+            self.value_pattern = re.compile(f"[^{stop}\\r\\n]*")
+            self.pattern = re.compile(
+                self.label_pattern.pattern + self.value_pattern.pattern,
+                re.IGNORECASE,
+            )
+            scan += self.value_pattern.pattern
+        self.scan = re.compile(scan)
+        self.keep = max((len(t) for t in matcher.terms), default=0) + 1
+        self.redactions = 0
+        self._in_value = False
+
+    def redact(self, text):
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lowercased ("İ"); offsets
+            # would no longer line up, so take the slower case-insensitive path.
+            text, count = self.pattern.subn(REDACTED_TEXT, text)
+            self.redactions += count
+            return text
+        out = []
+        last = pos = 0
+        search = self.scan.search
+        while True:
+            m = search(lowered, pos)
+            if m is None:
+                break
+            start = m.start()
+            if start and _WORD_CHAR.match(lowered, start - 1):
+                # Inside a word; a term may still start right after here.
+                pos = start + 1
+                continue
+            out.append(text[last:start])
+            out.append(REDACTED_TEXT)
+            last = pos = m.end()
+        if not out:
+            return text
+        self.redactions += len(out) // 2
+        out.append(text[last:])
+        return "".join(out)
+
+    def is_label(self, text):
+        return self.label_pattern.fullmatch(text.strip().rstrip(":").strip()) is not None
+
+    def redact_piece(self, text, final):
+        # Redacts a piece of a stream. Returns (redacted, carry): the carry
+        # may hold the start of a term and is prepended to the next piece.
+        # `final` marks a piece that ends on a line break (or the stream).
+        if self._in_value:
+            # Rest of an enhanced-mode value that started in an earlier piece.
+            skip = self.value_pattern.match(text).end()
+            self._in_value = skip == len(text) and not final
+            text = text[skip:]
+        if final:
+            return self.redact(text), ""
+
+        cut = max(0, len(text) - self.keep)
+        space = max(text.rfind(" ", 0, cut), text.rfind("\t", 0, cut))
+        if space >= cut - self.keep:
+            cut = space + 1
+        for m in self.label_pattern.finditer(text, max(0, cut - self.keep)):
+            if m.start() < cut < m.end():
+                cut = m.start()
+                break
+        head, carry = text[:cut], text[cut:]
+
+        if self.value_pattern is not None:
+            last = None
+            for last in self.pattern.finditer(head):
+                pass
+            if last is not None and last.end() == len(head):
+                # The value is cut off at the end of this piece.
+                skip = self.value_pattern.match(carry).end()
+                self._in_value = skip == len(carry)
+                carry = carry[skip:]
+        return self.redact(head), carry
+
+
+def count_line_breaks(text, after_cr=False):
+    # "\n", "\r\n" and the bare "\r" ending HL7 segments each count once;
+    # after_cr: the previous piece ended in "\r" (a "\r\n" split in two).
+    count = text.count("\n") + text.count("\r") - text.count("\r\n")
+    if after_cr and text.startswith("\n"):
+        count -= 1
+    return count
+
+
+def redact_text_stream(src, dst, redactor, limit=STREAM_LINE_LIMIT):
+    # Reads blocks of `limit` characters and redacts all complete lines of a
+    # block in one pass; memory stays bounded for any file and line size.
+    # Returns the number of lines (HL7 segments).
+    lines = 0
+    carry = ""
+    after_cr = False
+    while True:
+        block = src.read(limit)
+        if not block:
+            break
+        text = carry + block
+        end = max(text.rfind("\n"), text.rfind("\r")) + 1
+        if end:
+            out, _ = redactor.redact_piece(text[:end], final=True)
+            lines += count_line_breaks(text[:end], after_cr)
+            after_cr = text[end - 1] == "\r"
+            carry = text[end:]
+        else:
+            out, carry = redactor.redact_piece(text, final=False)
+        dst.write(out)
+    if carry:
+        out, _ = redactor.redact_piece(carry, final=True)
+        dst.write(out)
+        lines += 1
+    return lines
+
+
+def redact_table_stream(src, dst, redactor, delimiter):
+    # Columns whose header is a redaction term (e.g. "Date of Birth") have
+    # every value replaced; the header row itself is kept so the export
+    # stays loadable. Other cells are redacted like free text.
+    reader = csv.reader(src, delimiter=delimiter)
+    writer = csv.writer(dst, delimiter=delimiter, lineterminator="\n")
+    header = next(reader, None)
+    if header is None:
+        return 0
+    writer.writerow(header)
+    sensitive = {i for i, cell in enumerate(header) if redactor.is_label(cell)}
+    rows = 0
+    for row in reader:
+        out = []
+        for i, cell in enumerate(row):
+            if i in sensitive and cell:
+                redactor.redactions += 1
+                out.append(REDACTED_TEXT)
+            else:
+                out.append(redactor.redact(cell))
+        writer.writerow(out)
+        rows += 1
+    return rows
+
+
+def anonymize_text_export(input_path, output_path, terms, mode="standard",
+                          fmt=None):
+    matcher = terms if isinstance(terms, TermMatcher) else TermMatcher(terms)
+    fmt = fmt or text_export_format(input_path) or "text"
+    redactor = TextRedactor(matcher, mode, "|" if fmt == "hl7" else None)
+    started = time.perf_counter()
+    # surrogateescape passes bytes that are not valid UTF-8 through unchanged.
+    open_args = dict(
+        encoding="utf-8", errors="surrogateescape", newline="",
+        buffering=STREAM_BUFFER_SIZE,
+    )
+    with open(input_path, "r", **open_args) as src, \
+            open(output_path, "w", **open_args) as dst:
+        if fmt in TABLE_DELIMITERS:
+            lines = redact_table_stream(src, dst, redactor, TABLE_DELIMITERS[fmt])
+        else:
+            lines = redact_text_stream(src, dst, redactor)
+    seconds = time.perf_counter() - started
+    size = os.path.getsize(input_path)
+    return {
+        "format": fmt,
+        "lines": lines,
+        "redactions": redactor.redactions,
+        "bytes": size,
+        "seconds": seconds,
+        "mb_per_second": size / (1 << 20) / seconds if seconds else 0.0,
+    }
+
+
+def format_text_export_summary(stats):
+    return (
+        f"{stats['lines']} {'row(s)' if stats['format'] in TABLE_DELIMITERS else 'line(s)'}, "
+        f"{stats['redactions']} redaction(s), "
+        f"{stats['mb_per_second']:.1f} MB/s."
+    )
+
+
+# ----------------------------------------------------------------------
+# BATCH PROCESSING
+# ----------------------------------------------------------------------
+
+_WORKER_STATE = {}
+
+# Jobs above either limit run in the large lane on their own workers, so a
+# long scan never holds up the short reports queued behind it.
+LARGE_JOB_PAGES = 200
+LARGE_JOB_BYTES = 50 << 20
+LARGE_LANE_WORKERS = 1
+
+
+class JobTimeout(Exception):
+    pass
+
+
+def estimate_job_cost(path):
+    # Page count comes from the page tree only, no page is loaded. An
+    # unreadable file gets a zero page count and fails later in its job.
+    size = os.path.getsize(path)
+    try:
+        with fitz.open(path) as doc:
+            pages = doc.page_count
+    except Exception:
+        pages = 0
+    return {"pages": pages, "bytes": size}
+
+
+def is_large_job(cost):
+    return cost["pages"] > LARGE_JOB_PAGES or cost["bytes"] > LARGE_JOB_BYTES
+
+
+def set_memory_limit(limit_bytes):
+    # Caps the address space of the calling worker process so an oversized
+    # document fails with MemoryError instead of exhausting the machine.
+    # Silently a no-op where the resource module is unavailable (Windows).
+    if not limit_bytes:
+        return False
+    try:
+        import resource
+    except ImportError:
+        return False
+    try:
+        _soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit_bytes = min(limit_bytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, hard))
+    except (ValueError, OSError):
+        return False
+    return True
+
+
+def _init_batch_worker(terms, mode, verify_mode, policy, terms_file=None,
+                       languages=None, detect_language=True, job_timeout=None,
+                       memory_limit=None):
+    _WORKER_STATE["matcher"] = TermMatcher(terms, languages, detect_language)
+    _WORKER_STATE["detect_language"] = detect_language
+    _WORKER_STATE["store"] = None
+    if terms_file:
+        store = TermsStore(terms_file)
+        terms = store.load()
+        _WORKER_STATE["matcher"] = TermMatcher(
+            terms, store.languages, detect_language
+        )
+        _WORKER_STATE["store"] = store
+    _WORKER_STATE["mode"] = mode
+    _WORKER_STATE["verify_mode"] = verify_mode
+    _WORKER_STATE["policy"] = policy
+    _WORKER_STATE["job_timeout"] = job_timeout
+    set_memory_limit(memory_limit)
+
+
+def _redact_batch_job(data):
+    # Pick up dictionary edits between documents; the term index is only
+    # rebuilt when the terms file content actually changed.
+    store = _WORKER_STATE["store"]
+    if store is not None:
+        terms = store.reload_if_changed()
+        if terms is not None:
+            _WORKER_STATE["matcher"] = TermMatcher(
+                terms, store.languages, _WORKER_STATE["detect_language"]
+            )
+
+    started = time.perf_counter()
+    on_page = None
+    job_timeout = _WORKER_STATE["job_timeout"]
+    if job_timeout:
+        # Checked between pages: the worker stays usable for the next job,
+        # which a hard kill of the process would not allow.
+        deadline = started + job_timeout
+
+        def on_page(page_index, total_pages):
+            if time.perf_counter() > deadline:
+                raise JobTimeout(
+                    f"exceeded {job_timeout:g} s at page "
+                    f"{page_index + 1} of {total_pages}"
+                )
+
+    result = anonymize_document(
+        data,
+        _WORKER_STATE["matcher"],
+        _WORKER_STATE["mode"],
+        verify_mode=_WORKER_STATE["verify_mode"],
+        on_page=on_page,
+        policy=_WORKER_STATE["policy"],
+    )
+    result["seconds"] = time.perf_counter() - started
+    result["peak_memory"] = peak_memory_bytes()
+    return result
+
+
+class QueueGauge:
+    def __init__(self, q):
+        self.q = q
+        self.samples = 0
+        self.total = 0
+        self.peak = 0
+
+    def sample(self):
+        depth = self.q.qsize()
+        self.samples += 1
+        self.total += depth
+        self.peak = max(self.peak, depth)
+
+    def summary(self):
+        mean = self.total / self.samples if self.samples else 0.0
+        return {"capacity": self.q.maxsize, "mean": mean, "peak": self.peak}
+
+
+class BatchPipeline:
+    # Three overlapped stages connected by bounded queues:
+    #   reader thread  -> read queue  -> process pool (redaction)
+    #   process pool   -> write queue -> writer thread
+    # While file N is being redacted, file N+1 is prefetched and file N-1
+    # is written.
+    #
+    # Jobs are costed up front and split into two such pipelines ("lanes")
+    # running side by side: small documents shortest-first on most of the
+    # workers, large ones (see is_large_job) on LARGE_LANE_WORKERS of their
+    # own.
+    _DONE = object()
+    LANES = ("small", "large")
+
+    def __init__(self, terms, mode="standard", verify_mode="sampled",
+                 workers=None, prefetch=4, policy=None, terms_file=None,
+                 languages=None, detect_language=True, job_timeout=None,
+                 memory_limit=None, large_workers=LARGE_LANE_WORKERS):
+        # With terms_file set, workers load their terms from it and poll it
+        # for changes between documents; `terms` is then only a fallback.
+        self.terms = list(terms)
+        self.terms_file = terms_file
+        self.languages = dict(languages or {})
+        self.detect_language = detect_language
+        self.mode = mode
+        self.verify_mode = verify_mode
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.prefetch = max(1, prefetch)
+        self.policy = policy
+        self.job_timeout = job_timeout
+        self.memory_limit = memory_limit
+        self.large_workers = max(1, large_workers)
+
+    def schedule(self, jobs):
+        # Returns {"small": [...], "large": [...]}, each a list of
+        # (input_path, output_path, cost) sorted by ascending cost.
+        lanes = {lane: [] for lane in self.LANES}
+        for input_path, output_path in jobs:
+            try:
+                cost = estimate_job_cost(input_path)
+            except OSError:
+                cost = {"pages": 0, "bytes": 0}
+            lane = "large" if is_large_job(cost) else "small"
+            lanes[lane].append((input_path, output_path, cost))
+        for lane_jobs in lanes.values():
+            lane_jobs.sort(key=lambda job: (job[2]["pages"], job[2]["bytes"]))
+        return lanes
+
+    def run(self, jobs, on_result=None):
+        # jobs: iterable of (input_path, output_path)
+        # on_result(record) is called from the lanes' writer threads for
+        # each job, possibly from two threads at once.
+        lanes = self.schedule(jobs)
+        large_workers = min(self.large_workers, len(lanes["large"]))
+        workers = {
+            "small": max(1, self.workers - large_workers),
+            "large": large_workers,
+        }
+        started = time.perf_counter()
+        lane_stats = {}
+        failures = {}
+
+        def run_lane(lane):
+            try:
+                lane_stats[lane] = self._run_lane(
+                    lane, lanes[lane], workers[lane], on_result, started
+                )
+            except Exception as e:
+                failures[lane] = e
+
+        large_thread = None
+        if lanes["large"]:
+            large_thread = threading.Thread(
+                target=run_lane, args=("large",), daemon=True
+            )
+            large_thread.start()
+        run_lane("small")
+        if large_thread is not None:
+            large_thread.join()
+        # A failed lane has already reported its unprocessed jobs as error
+        # records; the failure itself goes to the caller.
+        for lane in self.LANES:
+            if lane in failures:
+                raise failures[lane]
+
+        wall = time.perf_counter() - started
+        records = lane_stats["small"].pop("records")
+        records += lane_stats.get("large", {}).pop("records", [])
+        return {
+            "documents": len(records),
+            "errors": sum(1 for r in records if r["error"] is not None),
+            "seconds": wall,
+            "lanes": lane_stats,
+            "records": records,
+        }
+
+    def _make_pool(self, workers):
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(
+                self.terms, self.mode, self.verify_mode, self.policy,
+                self.terms_file, self.languages, self.detect_language,
+                self.job_timeout, self.memory_limit,
+            ),
+        )
+
+    def _run_isolated(self, data):
+        # Runs one job in a pool of its own; raises BrokenProcessPool again
+        # if it is this job that kills its worker.
+        with self._make_pool(1) as pool:
+            return pool.submit(_redact_batch_job, data).result()
+
+    def _run_lane(self, lane, jobs, workers, on_result, batch_started):
+        # Large documents are prefetched one at a time to bound the memory
+        # held by documents waiting for a worker.
+        prefetch = self.prefetch if lane == "small" else 1
+        read_q = queue.Queue(maxsize=prefetch)
+        write_q = queue.Queue(maxsize=prefetch + workers)
+        read_gauge = QueueGauge(read_q)
+        write_gauge = QueueGauge(write_q)
+        busy = {"read": 0.0, "redact": 0.0, "write": 0.0}
+        records = []
+
+        def reader():
+            for input_path, output_path, cost in jobs:
+                started = time.perf_counter()
+                try:
+                    with open(input_path, "rb") as f:
+                        item = (input_path, output_path, cost, f.read(), None)
+                except Exception as e:
+                    item = (input_path, output_path, cost, None, e)
+                busy["read"] += time.perf_counter() - started
+                read_q.put(item)
+                read_gauge.sample()
+            read_q.put(self._DONE)
+
+        def writer():
+            while True:
+                item = write_q.get()
+                write_gauge.sample()
+                if item is self._DONE:
+                    break
+                input_path, output_path, cost, data, future, error = item
+                record = {
+                    "input": input_path,
+                    "output": output_path,
+                    "lane": lane,
+                    "cost": cost,
+                }
+                try:
+                    if error is not None:
+                        raise error
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        # A worker died while this job was queued or running.
+                        # Re-run it alone so only the job that crashed fails.
+                        result = self._run_isolated(data)
+                    started = time.perf_counter()
+                    with open(output_path, "wb") as f:
+                        f.write(result["data"])
+                    busy["write"] += time.perf_counter() - started
+                    busy["redact"] += result["seconds"]
+                    record.update(
+                        pages=result["pages"],
+                        leaks=result["leaks"],
+                        other_language=result["other_language"],
+                        unverifiable=result["unverifiable"],
+                        seconds=result["seconds"],
+                        peak_memory=result["peak_memory"],
+                        languages=result["languages"],
+                        error=None,
+                    )
+                except Exception as e:
+                    record["error"] = e
+                # Time from batch start until the output is on disk, i.e.
+                # including the time spent queued behind other jobs.
+                record["completed"] = time.perf_counter() - batch_started
+                records.append(record)
+                if on_result is not None:
+                    on_result(record)
+
+        started = time.perf_counter()
+        reader_thread = threading.Thread(target=reader, daemon=True)
+        writer_thread = threading.Thread(target=writer, daemon=True)
+        reader_thread.start()
+        writer_thread.start()
+
+        failure = None
+        pool = None
+        try:
+            pool = self._make_pool(workers)
+            while True:
+                item = read_q.get()
+                read_gauge.sample()
+                if item is self._DONE:
+                    break
+                input_path, output_path, cost, data, error = item
+                future = None
+                if error is None:
+                    try:
+                        future = pool.submit(_redact_batch_job, data)
+                    except BrokenProcessPool:
+                        # A worker died; the writer re-runs the jobs that
+                        # were in the old pool, new ones go to a fresh one.
+                        pool.shutdown(wait=False)
+                        pool = self._make_pool(workers)
+                        future = pool.submit(_redact_batch_job, data)
+                # Blocks once the writer falls behind, which in turn keeps
+                # the number of in-flight documents bounded.
+                write_q.put((input_path, output_path, cost, data, future, error))
+                write_gauge.sample()
+        except Exception as e:
+            failure = e
+        finally:
+            write_q.put(self._DONE)
+            writer_thread.join()
+            if pool is not None:
+                pool.shutdown()
+        if failure is not None:
+            # Jobs never handed to a worker would otherwise vanish silently.
+            done = {record["input"] for record in records}
+            for input_path, output_path, cost in jobs:
+                if input_path in done:
+                    continue
+                record = {
+                    "input": input_path,
+                    "output": output_path,
+                    "lane": lane,
+                    "cost": cost,
+                    "error": failure,
+                    "completed": time.perf_counter() - batch_started,
+                }
+                records.append(record)
+                if on_result is not None:
+                    on_result(record)
+            raise failure
+        reader_thread.join()
+
+        wall = time.perf_counter() - started
+        completed = sorted(r["completed"] for r in records)
+        return {
+            "documents": len(records),
+            "workers": workers,
+            "queues": {
+                "read": read_gauge.summary(),
+                "write": write_gauge.summary(),
+            },
+            "utilization": {
+                "read": busy["read"] / wall if wall else 0.0,
+                "redact": busy["redact"] / (wall * workers) if wall else 0.0,
+                "write": busy["write"] / wall if wall else 0.0,
+            },
+            "completed": {
+                str(q): percentile(completed, q) for q in BatchMetrics.QUANTILES
+            },
+            "records": records,
+        }
+
+
+def collect_batch_jobs(input_dir, output_dir, suffix="_anonymized"):
+    jobs = []
+    for name in sorted(os.listdir(input_dir)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        base = os.path.splitext(name)[0]
+        jobs.append((
+            os.path.join(input_dir, name),
+            os.path.join(output_dir, f"{base}{suffix}.pdf"),
+        ))
+    return jobs
+
+
+def collect_text_export_jobs(input_dir, output_dir, suffix="_anonymized"):
+    jobs = []
+    for name in sorted(os.listdir(input_dir)):
+        if text_export_format(name) is None:
+            continue
+        base, ext = os.path.splitext(name)
+        jobs.append((
+            os.path.join(input_dir, name),
+            os.path.join(output_dir, f"{base}{suffix}{ext}"),
+        ))
+    return jobs
+
+
+def format_batch_summary(stats):
+    lines = [
+        f"{stats['documents']} document(s), {stats['errors']} error(s) "
+        f"in {stats['seconds']:.1f} s"
+    ]
+    for lane in BatchPipeline.LANES:
+        lane_stats = stats["lanes"].get(lane)
+        if not lane_stats or not lane_stats["documents"]:
+            continue
+        queues = lane_stats["queues"]
+        util = lane_stats["utilization"]
+        done = lane_stats["completed"]
+        lines.append(
+            f"{lane.capitalize()} lane: {lane_stats['documents']} document(s) "
+            f"on {lane_stats['workers']} worker(s), "
+            f"completed by (p50/p90/p99) "
+            f"{done['0.5']:.1f}/{done['0.9']:.1f}/{done['0.99']:.1f} s\n"
+            f"  Queue depth (mean/peak/capacity): "
+            f"read {queues['read']['mean']:.1f}/{queues['read']['peak']}/{queues['read']['capacity']}, "
+            f"write {queues['write']['mean']:.1f}/{queues['write']['peak']}/{queues['write']['capacity']}\n"
+            f"  Stage utilization: read {util['read']:.0%}, "
+            f"redact {util['redact']:.0%}, write {util['write']:.0%}"
+        )
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# METRICS
+# ----------------------------------------------------------------------
+
+METRICS_PREFIX = "clinical_anonymizer"
+
+
+def peak_memory_bytes():
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in KiB elsewhere.
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+        get_info.argtypes = [
+            wintypes.HANDLE,
+            ctypes.POINTER(PROCESS_MEMORY_COUNTERS),
+            wintypes.DWORD,
+        ]
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if get_info(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    except Exception:
+        pass
+    return 0
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _prom_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class BatchMetrics:
+    # Cumulative counters for batch runs. Snapshots are written as JSON or
+    # in the Prometheus textfile format every `interval` seconds while the
+    # batch is running, and once more on stop(). Files are replaced
+    # atomically so a scraper never reads a partial snapshot.
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, path=None, fmt="json", interval=30.0):
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.documents = 0
+        self.pages = 0
+        self.image_only_pages = 0
+        self.blocks = 0
+        self.cached_blocks = 0
+        self.latencies = []
+        self.term_hits = {}
+        self.errors = {}
+        self.peak_memory = peak_memory_bytes()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, record):
+        with self.lock:
+            error = record.get("error")
+            if error is not None:
+                name = type(error).__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+                return
+            self.documents += 1
+            self.latencies.append(record["seconds"])
+            self.peak_memory = max(self.peak_memory, record.get("peak_memory", 0))
+            for page in record["pages"]:
+                self.pages += 1
+                if page["words"] == 0:
+                    self.image_only_pages += 1
+                self.blocks += page["blocks"]
+                self.cached_blocks += page["cached_blocks"]
+                languages = page.get("term_languages", {})
+                for term, count in page["terms"].items():
+                    # Keyed by language too: the tag comes from the terms
+                    # store the worker used, and may change between reloads.
+                    key = (term, languages.get(term) or NEUTRAL_LANGUAGE)
+                    self.term_hits[key] = self.term_hits.get(key, 0) + count
+
+    def snapshot(self):
+        with self.lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            latencies = sorted(self.latencies)
+            return {
+                "timestamp": time.time(),
+                "elapsed_seconds": elapsed,
+                "documents_total": self.documents,
+                "pages_total": self.pages,
+                "image_only_pages_total": self.image_only_pages,
+                "blocks_total": self.blocks,
+                "cached_blocks_total": self.cached_blocks,
+                "documents_per_second": self.documents / elapsed,
+                "pages_per_second": self.pages / elapsed,
+                "document_latency_seconds": {
+                    str(q): percentile(latencies, q) for q in self.QUANTILES
+                },
+                "document_latency_seconds_sum": sum(latencies),
+                "document_latency_seconds_count": len(latencies),
+                "term_hits_total": [
+                    {"term": term, "language": language, "hits": hits}
+                    for (term, language), hits in sorted(self.term_hits.items())
+                ],
+                "errors_total": dict(self.errors),
+                "peak_memory_bytes": max(self.peak_memory, peak_memory_bytes()),
+            }
+
+    def to_prometheus(self, snap):
+        p = METRICS_PREFIX
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(
+                    f'{k}="{_prom_label(v)}"' for k, v in labels.items()
+                )
+                suffix = "{" + label_text + "}" if label_text else ""
+                lines.append(f"{p}_{name}{suffix} {value}")
+
+        metric("documents_total", "counter", "Documents anonymized.",
+               [({}, snap["documents_total"])])
+        metric("pages_total", "counter", "Pages processed.",
+               [({}, snap["pages_total"])])
+        metric("image_only_pages_total", "counter",
+               "Pages without extractable text.",
+               [({}, snap["image_only_pages_total"])])
+        metric("blocks_total", "counter", "Text blocks matched.",
+               [({}, snap["blocks_total"])])
+        metric("cached_blocks_total", "counter",
+               "Text blocks served from the repeated-block cache.",
+               [({}, snap["cached_blocks_total"])])
+        metric("documents_per_second", "gauge", "Document throughput.",
+               [({}, snap["documents_per_second"])])
+        metric("pages_per_second", "gauge", "Page throughput.",
+               [({}, snap["pages_per_second"])])
+        metric("document_latency_seconds", "summary",
+               "Per-document redaction latency.",
+               [({"quantile": q}, v)
+                for q, v in snap["document_latency_seconds"].items()])
+        for suffix in ("sum", "count"):
+            lines.append(
+                f"{p}_document_latency_seconds_{suffix} "
+                f"{snap[f'document_latency_seconds_{suffix}']}"
+            )
+        metric("term_hits_total", "counter", "Redaction hits per term.",
+               [({"term": h["term"], "language": h["language"]}, h["hits"])
+                for h in snap["term_hits_total"]])
+        metric("errors_total", "counter", "Failed documents by error type.",
+               [({"type": k}, v) for k, v in sorted(snap["errors_total"].items())])
+        metric("peak_memory_bytes", "gauge", "Peak resident memory.",
+               [({}, snap["peak_memory_bytes"])])
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        if not self.path:
+            return
+        snap = self.snapshot()
+        if self.fmt == "prometheus":
+            text = self.to_prometheus(snap)
+        else:
+            text = json.dumps(snap, indent=2, ensure_ascii=False)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+    def start(self):
+        def loop():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.write()
+                except Exception:
+                    pass
+
+        if self.path and self._thread is None:
+            self._thread = threading.Thread(target=loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+
 # ----------------------------------------------------------------------
 # STYLED UI HELPER – STANDARD HEADER WITH PHOTO
 # ----------------------------------------------------------------------
@@ -140,25 +1618,142 @@ def add_photo_header(window, title, subtitle=None):
 # REDACTION TERMS MANAGER
 # ----------------------------------------------------------------------
 
+class TermsStore:
+    # redaction_terms.json is written atomically (temp file + os.replace) and
+    # carries a version stamp, so concurrent readers never see a partial file.
+    # changed() is a cheap stat() check; the content hash avoids reparsing
+    # when a file was touched but not modified.
+    def __init__(self, path):
+        self.path = path
+        self.version = 0
+        self.stamp = None
+        self.digest = None
+        self.languages = {}
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self):
+        stamp = self._stat()
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        return stamp, raw, hashlib.sha1(raw).hexdigest()
+
+    def _parse(self, raw):
+        data = json.loads(raw.decode("utf-8"))
+        # Older files are a bare list of terms without a version.
+        if isinstance(data, list):
+            return 0, data, {}
+        return (
+            int(data.get("version", 0)),
+            list(data["terms"]),
+            dict(data.get("languages", {})),
+        )
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                stamp, raw, digest = self._read()
+                self.version, terms, self.languages = self._parse(raw)
+                self.stamp, self.digest = stamp, digest
+                return terms
+        except Exception:
+            pass
+        self.version, self.stamp, self.digest = 0, self._stat(), None
+        self.languages = {}
+        return KEY_VALUE_PAIRS.copy()
+
+    def changed(self):
+        return self._stat() != self.stamp
+
+    def reload_if_changed(self):
+        # Returns the new term list, or None when nothing changed.
+        if not self.changed():
+            return None
+        try:
+            stamp, raw, digest = self._read()
+        except OSError:
+            self.stamp = self._stat()
+            return None
+        self.stamp = stamp
+        if digest == self.digest:
+            return None
+        try:
+            self.version, terms, self.languages = self._parse(raw)
+        except Exception:
+            return None
+        self.digest = digest
+        return terms
+
+    def save(self, terms, languages=None):
+        try:
+            _stamp, raw, _digest = self._read()
+            disk_version = self._parse(raw)[0]
+        except Exception:
+            disk_version = 0
+        version = max(self.version, disk_version) + 1
+        payload = {
+            "version": version,
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "terms": list(terms),
+            "languages": dict(languages or {}),
+        }
+        raw = json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.version = version
+        self.languages = dict(languages or {})
+        self.stamp = self._stat()
+        self.digest = hashlib.sha1(raw).hexdigest()
+
+
 class RedactionTermsManager:
     def __init__(self, parent):
         self.parent = parent
         self.terms_file = os.path.join(BASE_DIR, "redaction_terms.json")
+        self.store = TermsStore(self.terms_file)
         self.terms = self.load_terms()
+        self.languages = dict(self.store.languages)
 
     def load_terms(self):
-        try:
-            if os.path.exists(self.terms_file):
-                with open(self.terms_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception:
-            pass
-        return KEY_VALUE_PAIRS.copy()
+        return self.store.load()
+
+    def create_matcher(self, detect_language=True):
+        # The matcher is kept while the terms are unchanged so the blocks it
+        # learned from earlier documents carry over to the next one.
+        key = (
+            tuple(self.terms),
+            tuple(sorted(self.languages.items())),
+            detect_language,
+        )
+        if getattr(self, "_matcher_key", None) != key:
+            self._matcher = TermMatcher(self.terms, self.languages, detect_language)
+            self._matcher_key = key
+        return self._matcher
+
+    def reload_if_changed(self):
+        terms = self.store.reload_if_changed()
+        if terms is None:
+            return False
+        self.terms = terms
+        self.languages = dict(self.store.languages)
+        return True
 
     def save_terms(self):
         try:
-            with open(self.terms_file, "w", encoding="utf-8") as f:
-                json.dump(self.terms, f, indent=2, ensure_ascii=False)
+            self.store.save(self.terms, self.languages)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save terms: {e}")
 
@@ -199,8 +1794,16 @@ class RedactionTermsManager:
         self.new_term_var = tk.StringVar()
         entry = ttk.Entry(add_group, textvariable=self.new_term_var)
         entry.grid(row=1, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+        self.new_term_language = tk.StringVar(value=NEUTRAL_LANGUAGE)
+        ttk.Combobox(
+            add_group,
+            textvariable=self.new_term_language,
+            values=[NEUTRAL_LANGUAGE, *BUILTIN_TERMS_BY_LANGUAGE],
+            state="readonly",
+            width=8,
+        ).grid(row=1, column=1, padx=(0, 10))
         ttk.Button(add_group, text="Add Term", command=self.add_term).grid(
-            row=1, column=1
+            row=1, column=2
         )
 
         search_group = ttk.Frame(top_frame)
@@ -289,6 +1892,7 @@ class RedactionTermsManager:
             messagebox.showwarning("Warning", "Term already exists.")
             return
         self.terms.append(term)
+        self.languages[term] = self.new_term_language.get()
         self.new_term_var.set("")
         self.refresh_listbox()
 
@@ -366,6 +1970,8 @@ class RedactionTermsManager:
             if new and new != old:
                 if new not in self.terms:
                     self.terms[self.terms.index(old)] = new
+                    if old in self.languages:
+                        self.languages[new] = self.languages.pop(old)
                     self.refresh_listbox()
                 else:
                     messagebox.showwarning(
@@ -392,6 +1998,7 @@ class RedactionTermsManager:
             "Confirm Delete", f"Are you sure you want to delete '{term}'?"
         ):
             self.terms.remove(term)
+            self.languages.pop(term, None)
             self.refresh_listbox()
 
     def reset_terms(self):
@@ -400,6 +2007,7 @@ class RedactionTermsManager:
             "This will restore the default list and remove your custom changes. Continue?",
         ):
             self.terms = KEY_VALUE_PAIRS.copy()
+            self.languages = {}
             self.refresh_listbox()
 
     def save_and_close(self, window):
@@ -513,6 +2121,241 @@ class LicenseWindow:
         ttk.Button(btn_frame, text="Close", command=w.destroy).pack()
 
 
+# Preview pages are rendered at a low resolution; at most
+# PREVIEW_CACHE_PAGES rendered pages are kept, the rest re-render on demand.
+PREVIEW_DPI = 50
+PREVIEW_CACHE_PAGES = 40
+PREVIEW_GAP = 16
+
+# PyMuPDF is not thread-safe. Held by a preview render thread while it has
+# documents open and by an anonymization run for its whole duration.
+FITZ_LOCK = threading.Lock()
+
+
+class PreviewWindow:
+    # One instance per preview window; the app closes the previous one
+    # before opening another.
+    def __init__(self, parent):
+        self.parent = parent
+        self.window = None
+        self.requests = None
+        self.closed = False
+
+    def show(self, source_path, output_path=None, matcher=None):
+        w = tk.Toplevel(self.parent)
+        w.title("Preview – Clinical Anonymizer")
+        w.geometry("1000x760")
+        w.transient(self.parent)
+        if hasattr(self.parent, "user_photo_small"):
+            w.iconphoto(False, self.parent.user_photo_small)
+
+        add_photo_header(
+            w,
+            "Preview",
+            "Original with detected terms (left) and anonymized result (right).",
+        )
+
+        main = ttk.Frame(w, padding="0 20 20 20")
+        main.pack(fill=tk.BOTH, expand=True)
+        main.rowconfigure(0, weight=1)
+        main.columnconfigure(0, weight=1)
+
+        self.window = w
+        self.canvas = tk.Canvas(main, background="#e5e5e5", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        scroll = ttk.Scrollbar(main, orient=tk.VERTICAL, command=self.on_scroll)
+        scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.scrollbar = scroll
+        self.canvas.configure(yscrollcommand=self.on_canvas_scrolled)
+
+        btn_frame = ttk.Frame(main)
+        btn_frame.grid(row=1, column=0, sticky=tk.E, pady=(15, 0))
+        ttk.Button(btn_frame, text="Close", command=self.close).pack()
+
+        self.canvas.create_text(
+            20, 20, text="Loading preview…", anchor=tk.NW, tags="loading"
+        )
+        self.canvas.bind("<Configure>", lambda e: self.schedule_update())
+        self.canvas.bind("<MouseWheel>", self.on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_units(-1))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_units(1))
+        w.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.layout = []
+        self.cache = LRUCache(PREVIEW_CACHE_PAGES)
+        self.items = {}
+        self.pending = set()
+        self.wanted = frozenset()
+        self.update_scheduled = False
+        self.requests = queue.LifoQueue()
+
+        paths = [source_path] + ([output_path] if output_path else [])
+        threading.Thread(
+            target=self.render_loop,
+            args=(paths, matcher, self.requests),
+            daemon=True,
+        ).start()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.requests is not None:
+            self.requests.put(None)
+        if self.window is not None:
+            try:
+                self.window.destroy()
+            except tk.TclError:
+                pass
+
+    # RENDER THREAD -----------------------------------------------------
+    def render_loop(self, paths, matcher, requests):
+        with FITZ_LOCK:
+            if not self.closed:
+                self.render_documents(paths, matcher, requests)
+
+    def render_documents(self, paths, matcher, requests):
+        try:
+            docs = [open_document(p) for p in paths]
+        except Exception as e:
+            try:
+                self.window.after(0, lambda error=e: self.show_error(error))
+            except (tk.TclError, RuntimeError):
+                pass
+            return
+        try:
+            sizes = [[(p.rect.width, p.rect.height) for p in doc] for doc in docs]
+            if matcher is not None:
+                matcher, _detected = matcher.for_document(docs[0])
+            self.window.after(0, lambda: self.set_layout(sizes))
+            while True:
+                item = requests.get()
+                if item is None:
+                    break
+                if item not in self.wanted:
+                    # Scrolled out of view before its turn came.
+                    self.window.after(0, lambda key=item: self.pending.discard(key))
+                    continue
+                side, index = item
+                page = docs[side][index]
+                pix = page.get_pixmap(dpi=PREVIEW_DPI, alpha=False)
+                image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+                hits = []
+                if side == 0 and matcher is not None:
+                    hits = [rect for _term, rect in matcher.find(page)]
+                self.window.after(
+                    0,
+                    lambda key=item, image=image, hits=hits:
+                        self.place_page(key, image, hits),
+                )
+        except (tk.TclError, RuntimeError):
+            # Window closed while rendering.
+            pass
+        finally:
+            for doc in docs:
+                doc.close()
+
+    # MAIN THREAD -------------------------------------------------------
+    def show_error(self, error):
+        self.canvas.delete("loading")
+        self.canvas.create_text(
+            20, 20, text=f"Could not open document: {error}", anchor=tk.NW
+        )
+
+    def set_layout(self, sizes):
+        self.canvas.delete("loading")
+        scale = PREVIEW_DPI / 72
+        widths = [
+            max((w for w, _h in side), default=0) * scale for side in sizes
+        ]
+        x_offsets = []
+        x = PREVIEW_GAP
+        for width in widths:
+            x_offsets.append(x)
+            x += width + PREVIEW_GAP
+
+        y = PREVIEW_GAP
+        for index in range(max(len(side) for side in sizes)):
+            height = 0
+            for side, pages in enumerate(sizes):
+                if index >= len(pages):
+                    continue
+                w, h = pages[index][0] * scale, pages[index][1] * scale
+                x0 = x_offsets[side]
+                self.canvas.create_rectangle(
+                    x0, y, x0 + w, y + h, fill="white", outline="#b0b0b0"
+                )
+                self.canvas.create_text(
+                    x0 + w / 2, y + h / 2, text=f"Page {index + 1}", fill="#909090"
+                )
+                height = max(height, h)
+            self.layout.append((y, y + height, x_offsets, scale))
+            y += height + PREVIEW_GAP
+
+        self.sides = len(sizes)
+        self.canvas.configure(scrollregion=(0, 0, x, y))
+        self.schedule_update()
+
+    def schedule_update(self):
+        if not self.update_scheduled:
+            self.update_scheduled = True
+            self.window.after_idle(self.update_visible)
+
+    def update_visible(self):
+        self.update_scheduled = False
+        if not self.layout:
+            return
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        wanted = set()
+        for index, (y0, y1, _x, _scale) in enumerate(self.layout):
+            if y1 < top or y0 > bottom:
+                continue
+            for side in range(self.sides):
+                key = (side, index)
+                wanted.add(key)
+                if self.cache.get(key) is None and key not in self.pending:
+                    self.pending.add(key)
+                    self.requests.put(key)
+        self.wanted = frozenset(wanted)
+
+    def place_page(self, key, image, hits):
+        self.pending.discard(key)
+        if not self.window.winfo_exists():
+            return
+        side, index = key
+        y0, _y1, x_offsets, scale = self.layout[index]
+        x0 = x_offsets[side]
+        photo = ImageTk.PhotoImage(image)
+        evicted = self.cache.put(key, photo)
+        if evicted is not None:
+            for item in self.items.pop(evicted[0], []):
+                self.canvas.delete(item)
+
+        items = [self.canvas.create_image(x0, y0, image=photo, anchor=tk.NW)]
+        for rect in hits:
+            items.append(self.canvas.create_rectangle(
+                x0 + rect.x0 * scale, y0 + rect.y0 * scale,
+                x0 + rect.x1 * scale, y0 + rect.y1 * scale,
+                outline="#d93025", width=2,
+            ))
+        self.items[key] = items
+
+    def on_scroll(self, *args):
+        self.canvas.yview(*args)
+        self.schedule_update()
+
+    def on_canvas_scrolled(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_update()
+
+    def scroll_units(self, units):
+        self.canvas.yview_scroll(units, "units")
+
+    def on_mousewheel(self, event):
+        self.scroll_units(int(-event.delta / 120) or (-1 if event.delta > 0 else 1))
+
+
 # ----------------------------------------------------------------------
 # MAIN APP
 # ----------------------------------------------------------------------
@@ -538,11 +2381,14 @@ class PDFAnonymizerApp:
             value="Ready to anonymize clinical PDF documents."
         )
         self.redaction_mode = tk.StringVar(value="standard")
+        self.verify_mode = tk.StringVar(value="sampled")
+        self.detect_language = tk.BooleanVar(value=True)
 
         self.terms_manager = RedactionTermsManager(root)
         self.help_window = HelpWindow(root)
         self.ack_window = AcknowledgmentWindow(root)
         self.license_window = LicenseWindow(root)
+        self.preview_window = None
 
         self.interactive_widgets = []
 
@@ -703,6 +2549,18 @@ class PDFAnonymizerApp:
         )
         self.radio_aggressive.pack(anchor=tk.W, pady=3)
 
+        ttk.Label(mode, text="Leak Verification", font=self.label_font).pack(anchor=tk.W, pady=(10, 5))
+
+        verify = ttk.Frame(mode)
+        verify.pack(anchor=tk.W)
+        self.verify_radios = []
+        for text, value in (("Off", "off"), ("Sampled pages", "sampled"), ("All pages", "full")):
+            rb = ttk.Radiobutton(
+                verify, text=text, variable=self.verify_mode, value=value
+            )
+            rb.pack(side=tk.LEFT, padx=(0, 10))
+            self.verify_radios.append(rb)
+
         cfg = ttk.Frame(cfg_frame)
         cfg.grid(row=0, column=1, sticky="nwe", padx=(10, 0))
         ttk.Label(cfg, text="Sensitive Terms", font=self.label_font).pack(anchor=tk.W, pady=(0, 5))
@@ -721,6 +2579,13 @@ class PDFAnonymizerApp:
         )
         self.manage_terms_btn.pack(anchor=tk.W, pady=(0, 4))
 
+        self.detect_language_check = ttk.Checkbutton(
+            cfg,
+            text="Detect document language (only match its terms)",
+            variable=self.detect_language,
+        )
+        self.detect_language_check.pack(anchor=tk.W, pady=(6, 0))
+
         buttons = ttk.LabelFrame(main, text="3. Execute", padding="15")
         buttons.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=10)
         buttons.columnconfigure(0, weight=1) 
@@ -742,6 +2607,12 @@ class PDFAnonymizerApp:
         )
         self.reset_btn.pack(side=tk.LEFT, padx=10, ipady=5)
 
+        self.preview_btn = ttk.Button(
+            buttons_inner, text="Preview", command=self.show_preview,
+            style="Accent.TButton"
+        )
+        self.preview_btn.pack(side=tk.LEFT, padx=10, ipady=5)
+
         status = ttk.Frame(main, padding="10 0 0 0")
         status.grid(
             row=5, column=0, sticky=(tk.W, tk.E), pady=(10, 0)
@@ -772,9 +2643,12 @@ class PDFAnonymizerApp:
             self.output_filename_entry,
             self.radio_standard,
             self.radio_aggressive,
+            *self.verify_radios,
             self.manage_terms_btn,
+            self.detect_language_check,
             self.anonymize_btn,
             self.reset_btn,
+            self.preview_btn,
         ]
 
     # ------------------------------------------------------------------
@@ -784,12 +2658,18 @@ class PDFAnonymizerApp:
     def browse_input_file(self):
         filename = filedialog.askopenfilename(
             title="Select PDF Document for Anonymization",
-            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+            filetypes=[
+                ("PDF files", "*.pdf"),
+                ("Text exports", " ".join(f"*{ext}" for ext in TEXT_EXPORT_FORMATS)),
+                ("All files", "*.*"),
+            ],
         )
         if filename:
             self.input_file.set(filename)
-            base = os.path.splitext(os.path.basename(filename))[0]
-            self.output_filename.set(f"{base}_anonymized.pdf")
+            base, ext = os.path.splitext(os.path.basename(filename))
+            if text_export_format(filename) is None:
+                ext = ".pdf"
+            self.output_filename.set(f"{base}_anonymized{ext}")
             self.output_folder.set(os.path.dirname(filename))
 
     def browse_output_folder(self):
@@ -843,94 +2723,102 @@ class PDFAnonymizerApp:
             messagebox.showerror("Error", "Please specify an output folder.")
             return
 
+        # The preview would keep using PyMuPDF alongside the run.
+        if self.preview_window is not None:
+            self.preview_window.close()
         self.toggle_ui_state(False)
         self.progress.set(0)
-        th = threading.Thread(target=self.anonymize_pdf, daemon=True)
+        th = threading.Thread(target=self.run_anonymization, daemon=True)
         th.start()
 
+    def run_anonymization(self):
+        # Waits for a closing preview to release its documents first.
+        with FITZ_LOCK:
+            self.anonymize_pdf()
+
     def anonymize_pdf(self):
         try:
             input_path = self.input_file.get()
             output_path = os.path.join(self.output_folder.get(), self.output_filename.get())
 
+            if text_export_format(input_path) is not None:
+                self.anonymize_text_export_file(input_path, output_path)
+                return
+
             self.safe_update_status("Opening PDF document…")
             self.safe_update_progress(10)
 
-            # --- This is the fix for the re-run bug ---
-            with open(input_path, "rb") as f:
-                file_data = f.read()
-            
-            doc = fitz.open(stream=file_data, filetype="pdf")
-            # --- End of fix ---
-
-            total_pages = len(doc)
+            doc = open_document(input_path)
 
-         
-            all_terms = [t.strip() for t in self.terms_manager.terms if t.strip()]
-            single_terms = [t for t in all_terms if " " not in t]
-            phrase_terms = [t for t in all_terms if " " in t]
-            single_terms_set = {t.lower() for t in single_terms}
+            self.terms_manager.reload_if_changed()
+            matcher = self.terms_manager.create_matcher(self.detect_language.get())
+            narrowed, detected = matcher.for_document(doc)
 
-            for page_index, page in enumerate(doc):
+            def on_page(page_index, total_pages):
                 self.safe_update_status(
                     f"Processing page {page_index + 1} of {total_pages}…"
                 )
-                progress = 10 + (page_index / max(total_pages, 1)) * 80
+                progress = 10 + (page_index / max(total_pages, 1)) * 75
                 self.safe_update_progress(progress)
 
-                
-                words = page.get_text("words") or []
-                for (x0, y0, x1, y1, text, *_rest) in words:
-                    norm = text.strip(",:;").lower()
-                    if norm in single_terms_set:
-                        rect = fitz.Rect(x0, y0, x1, y1)
-                        margin = 0.5
-                        rect = fitz.Rect(
-                            rect.x0 - margin,
-                            rect.y0 - margin,
-                            rect.x1 + margin,
-                            rect.y1 + margin,
-                        )
-                        page.add_redact_annot(rect, text="[REDACTED]", fill=(0, 0, 0))
-
-                        if self.redaction_mode.get() == "aggressive":
-                            right = fitz.Rect(rect.x1, rect.y0 - 2,
-                                              rect.x1 + 150, rect.y1 + 2)
-                            page.add_redact_annot(right, text=" ", fill=(0, 0, 0))
-                            below = fitz.Rect(rect.x0 - 10, rect.y1,
-                                              rect.x1 + 150, rect.y1 + 20)
-                            page.add_redact_annot(below, text=" ", fill=(0, 0, 0))
-
-                
-                for phrase in phrase_terms:
-                    
-                    # --- THIS IS THE CORRECTED LINE ---
-                    # Using the integer 1 directly to force case-insensitivity
-                    for rect in page.search_for(phrase, flags=1):
-                    
-                        page.add_redact_annot(rect, text="[REDACTED]", fill=(0, 0, 0))
-                        if self.redaction_mode.get() == "aggressive":
-                            right = fitz.Rect(rect.x1, rect.y0 - 2,
-                                              rect.x1 + 150, rect.y1 + 2)
-                            page.add_redact_annot(right, text=" ", fill=(0, 0, 0))
-                            below = fitz.Rect(rect.x0 - 10, rect.y1,
-                                              rect.x1 + 150, rect.y1 + 20)
-                            page.add_redact_annot(below, text=" ", fill=(0, 0, 0))
-
-                page.apply_redactions()
+            page_stats = redact_document(
+                doc, narrowed, self.redaction_mode.get(), on_page
+            )
+
+            verify_mode = self.verify_mode.get()
+            report = {"leaks": {}, "other_language": {}, "unverifiable": []}
+            if verify_mode != "off":
+                self.safe_update_status("Verifying redactions…")
+                self.safe_update_progress(88)
+                report = verify_redactions(doc, matcher, verify_mode, narrowed)
+            leaks = report["leaks"]
+            unverifiable = report["unverifiable"]
 
             self.safe_update_status("Saving anonymized document…")
             self.safe_update_progress(95)
-            doc.save(output_path)
+            save_document(doc, output_path)
             doc.close()
 
             self.safe_update_progress(100)
-            self.safe_update_status("Document anonymization completed successfully.")
+            title = "Process Completed"
+            message = (
+                f"Document successfully anonymized and saved to:\n{output_path}\n\n"
+                f"{format_timing_summary(page_stats)}\n"
+                f"Terms matched: {format_languages(detected)}.\n\n"
+            )
+            if leaks or unverifiable:
+                if leaks:
+                    self.safe_update_status(
+                        f"Completed – verification found terms on {len(leaks)} page(s)."
+                    )
+                    message += "Verification found terms that are still present. "
+                else:
+                    self.safe_update_status(
+                        f"Completed – {len(unverifiable)} page(s) could not be verified."
+                    )
+                if unverifiable:
+                    message += (
+                        "Pages without extractable text (e.g. scans) could not "
+                        "be searched for terms. "
+                    )
+                title = "Process Completed – Verification Warning"
+                message += (
+                    "Please review these pages:\n"
+                    + format_leak_report(leaks, unverifiable=unverifiable)
+                    + "\n\n"
+                )
+            else:
+                self.safe_update_status("Document anonymization completed successfully.")
+            if report["other_language"]:
+                message += (
+                    "Not checked (other language) – terms of languages not "
+                    "detected in this document were left as they are:\n"
+                    + format_leak_report(report["other_language"])
+                    + "\n\n"
+                )
 
             if self.safe_ask_yes_no(
-                "Process Completed",
-                f"Document successfully anonymized and saved to:\n{output_path}\n\n"
-                "Do you want to open the output folder?",
+                title, message + "Do you want to open the output folder?"
             ):
                 try:
                     webbrowser.open(os.path.realpath(self.output_folder.get()))
@@ -948,6 +2836,45 @@ class PDFAnonymizerApp:
             self.root.after(0, lambda: self.progress.set(0))
             self.root.after(100, lambda: self.safe_update_status("Ready."))
 
+    def anonymize_text_export_file(self, input_path, output_path):
+        self.safe_update_status("Anonymizing text export…")
+        self.safe_update_progress(10)
+        self.terms_manager.reload_if_changed()
+        matcher = self.terms_manager.create_matcher(detect_language=False)
+        stats = anonymize_text_export(
+            input_path, output_path, matcher, self.redaction_mode.get()
+        )
+        self.safe_update_progress(100)
+        self.safe_update_status("Text export anonymization completed successfully.")
+        if self.safe_ask_yes_no(
+            "Process Completed",
+            f"Export successfully anonymized and saved to:\n{output_path}\n\n"
+            f"{format_text_export_summary(stats)}\n\n"
+            "Do you want to open the output folder?",
+        ):
+            try:
+                webbrowser.open(os.path.realpath(self.output_folder.get()))
+            except Exception as e:
+                self.safe_show_error("Error", f"Could not open folder: {e}")
+
+    def show_preview(self):
+        source_path = self.input_file.get()
+        if (
+            not source_path
+            or not os.path.exists(source_path)
+            or text_export_format(source_path) is not None
+        ):
+            messagebox.showerror("Error", "Please select a valid PDF document.")
+            return
+        output_path = os.path.join(self.output_folder.get(), self.output_filename.get())
+        if not os.path.exists(output_path):
+            output_path = None
+        matcher = self.terms_manager.create_matcher(self.detect_language.get())
+        if self.preview_window is not None:
+            self.preview_window.close()
+        self.preview_window = PreviewWindow(self.root)
+        self.preview_window.show(source_path, output_path, matcher)
+
     def reset(self):
         self.input_file.set("")
         self.output_folder.set(os.getcwd())
@@ -955,9 +2882,123 @@ class PDFAnonymizerApp:
         self.progress.set(0)
         self.status_text.set("Ready to anonymize clinical PDF documents.")
         self.redaction_mode.set("standard")
+        self.verify_mode.set("sampled")
+        self.detect_language.set(True)
+
+
+def run_batch(argv):
+    parser = argparse.ArgumentParser(
+        prog="Clinical Anonymizer",
+        description=(
+            "Anonymize every PDF and text export (.txt, .csv, .tsv, .psv, "
+            ".hl7) in a folder without opening the GUI."
+        ),
+    )
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--mode", choices=("standard", "aggressive"), default="standard")
+    parser.add_argument("--verify", choices=("off", "sampled", "full"), default="sampled")
+    parser.add_argument("--images", choices=tuple(IMAGE_POLICY_FLAGS), default=None,
+                        help="images under a redaction (default: per mode)")
+    parser.add_argument("--graphics", choices=tuple(GRAPHICS_POLICY_FLAGS),
+                        default=None,
+                        help="vector graphics under a redaction (default: per mode)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--prefetch", type=int, default=4)
+    parser.add_argument("--job-timeout", type=float, default=None,
+                        help="fail a document after this many seconds")
+    parser.add_argument("--job-memory", type=int, default=None,
+                        help="per-worker memory limit in MB (not on Windows)")
+    parser.add_argument("--large-workers", type=int, default=LARGE_LANE_WORKERS,
+                        help="workers reserved for large documents")
+    parser.add_argument("--no-language-detection", action="store_true",
+                        help="match the full term list in every document")
+    parser.add_argument("--metrics", default=None,
+                        help="write a metrics snapshot to this file")
+    parser.add_argument("--metrics-format", choices=("json", "prometheus"),
+                        default="json")
+    parser.add_argument("--metrics-interval", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    terms_manager = RedactionTermsManager(None)
+
+    metrics = BatchMetrics(
+        args.metrics, args.metrics_format, args.metrics_interval
+    )
+
+    def on_result(record):
+        metrics.record(record)
+        if record["error"] is not None:
+            print(f"ERROR {record['input']}: {record['error']}", file=sys.stderr)
+        elif record["leaks"] or record["unverifiable"]:
+            label = "LEAKS" if record["leaks"] else "UNVERIFIED"
+            report = format_leak_report(
+                record["leaks"], unverifiable=record["unverifiable"]
+            )
+            print(f"{label} {record['input']}:\n{report}")
+        else:
+            print(f"OK    {record['input']} ({format_languages(record['languages'])})")
+        if record.get("other_language"):
+            print(
+                f"      not checked (other language):\n"
+                f"{format_leak_report(record['other_language'])}"
+            )
+
+    policy = dict(REDACTION_POLICIES[args.mode])
+    if args.images:
+        policy["images"] = args.images
+    if args.graphics:
+        policy["graphics"] = args.graphics
+
+    pipeline = BatchPipeline(
+        terms_manager.terms, args.mode, args.verify, args.workers,
+        args.prefetch, policy=policy, terms_file=terms_manager.terms_file,
+        languages=terms_manager.languages,
+        detect_language=not args.no_language_detection,
+        job_timeout=args.job_timeout,
+        memory_limit=args.job_memory << 20 if args.job_memory else None,
+        large_workers=args.large_workers,
+    )
+    metrics.start()
+    try:
+        stats = pipeline.run(
+            collect_batch_jobs(args.input_dir, args.output_dir), on_result
+        )
+        print(format_batch_summary(stats))
+
+        errors = stats["errors"]
+        # Text exports are streamed in this process instead of being loaded
+        # into the worker pool, so multi-gigabyte files need constant memory.
+        matcher = TermMatcher(terms_manager.terms, terms_manager.languages)
+        for input_path, output_path in collect_text_export_jobs(
+            args.input_dir, args.output_dir
+        ):
+            record = {"input": input_path, "output": output_path, "pages": []}
+            try:
+                text_stats = anonymize_text_export(
+                    input_path, output_path, matcher, args.mode
+                )
+            except Exception as e:
+                errors += 1
+                record["error"] = e
+                print(f"ERROR {input_path}: {e}", file=sys.stderr)
+            else:
+                record.update(
+                    seconds=text_stats["seconds"],
+                    peak_memory=peak_memory_bytes(),
+                    error=None,
+                )
+                print(f"OK    {input_path} ({format_text_export_summary(text_stats)})")
+            metrics.record(record)
+    finally:
+        metrics.stop()
+    return 1 if errors else 0
 
 
 def main():
+    if len(sys.argv) > 1:
+        sys.exit(run_batch(sys.argv[1:]))
     root = tk.Tk()
     sv_ttk.set_theme("light")
     app = PDFAnonymizerApp(root)
@@ -965,4 +3006,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    multiprocessing.freeze_support()
+    main()
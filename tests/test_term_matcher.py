@@ -0,0 +1,72 @@
+import importlib.util
+import os
+
+import fitz
+
+MODULE_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "Code", "Clinical Anonymizer.py"
+)
+spec = importlib.util.spec_from_file_location("clinical_anonymizer", MODULE_PATH)
+ca = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ca)
+
+
+def make_page(lines):
+    doc = fitz.open()
+    page = doc.new_page()
+    writer = fitz.TextWriter(page.rect)
+    for i, line in enumerate(lines):
+        writer.append((50, 50 + 14 * i), line)
+    writer.write_text(page)
+    return doc, page
+
+
+def found_terms(lines):
+    _doc, page = make_page(lines)
+    matcher = ca.TermMatcher(ca.KEY_VALUE_PAIRS, detect_language=False)
+    return sorted({term for term, _rect in matcher.find(page)})
+
+
+def test_word_after_line_end_hyphen_is_matched_on_its_own():
+    assert found_terms(["Follow-", "Name: John Smith"]) == ["Name"]
+
+
+def test_hyphenated_term_split_across_lines():
+    assert found_terms(["Please note Patienten-", "ID: 55"]) == ["Patienten-ID"]
+
+
+def test_phrase_wrapped_across_lines():
+    assert found_terms(["Medical Record", "Number: 5"]) == ["Medical Record Number"]
+
+
+def test_labels_next_to_punctuation():
+    assert found_terms(["(Date of Birth)"]) == ["Date of Birth"]
+    assert found_terms(["Date of Birth/DOB: 1.1.80"]) == ["DOB", "Date of Birth"]
+    assert found_terms(["Date of Birth."]) == ["Date of Birth"]
+    assert found_terms(["Patient ID#: 55"]) == ["Patient ID"]
+    assert found_terms(['"Patient ID" 5']) == ["Patient ID"]
+
+
+def test_terms_containing_punctuation():
+    assert found_terms(["Geb.: 1.1.80"]) == ["Geb."]
+    assert found_terms(["Certificate/License Number: 7"]) == ["Certificate/License Number"]
+    assert found_terms(["Né(e) le 1.1.80"]) == ["Né(e) le"]
+    assert found_terms(["Date d’admission: 3.3.21"]) == ["Date d'admission"]
+
+
+def test_hyphen_split_is_redacted_and_verified():
+    doc, _page = make_page(["Follow-", "Name: John Smith"])
+    result = ca.anonymize_document(doc.tobytes(), ca.KEY_VALUE_PAIRS, verify_mode="full")
+    assert sum(page["hits"] for page in result["pages"]) == 1
+    assert result["leaks"] == {}
+
+
+def test_pages_without_text_are_reported_as_not_verifiable():
+    doc, _page = make_page(["Name: John Smith"])
+    doc.new_page()
+    result = ca.anonymize_document(doc.tobytes(), ca.KEY_VALUE_PAIRS, verify_mode="full")
+    assert result["leaks"] == {}
+    assert result["unverifiable"] == [2]
+    assert ca.format_leak_report(result["leaks"], unverifiable=[2]) == (
+        "Page 2: not verifiable (no extractable text)"
+    )
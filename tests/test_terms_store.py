@@ -0,0 +1,50 @@
+import importlib.util
+import json
+import os
+
+MODULE_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "Code", "Clinical Anonymizer.py"
+)
+spec = importlib.util.spec_from_file_location("clinical_anonymizer", MODULE_PATH)
+ca = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ca)
+
+
+def test_save_is_picked_up_by_reload_if_changed(tmp_path):
+    path = str(tmp_path / "redaction_terms.json")
+    writer = ca.TermsStore(path)
+    writer.save(["Name"], {"Name": "en"})
+    reader = ca.TermsStore(path)
+    assert reader.load() == ["Name"]
+    assert reader.reload_if_changed() is None
+
+    writer.save(["Name", "Geburtsdatum"], {"Name": "en", "Geburtsdatum": "de"})
+    assert reader.reload_if_changed() == ["Name", "Geburtsdatum"]
+    assert reader.languages == {"Name": "en", "Geburtsdatum": "de"}
+    assert reader.version == writer.version == 2
+    assert reader.reload_if_changed() is None
+
+
+def test_touch_without_content_change_is_not_a_reload(tmp_path):
+    path = str(tmp_path / "redaction_terms.json")
+    store = ca.TermsStore(path)
+    store.save(["Name"])
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert store.changed()
+    assert store.reload_if_changed() is None
+    assert not store.changed()
+
+
+def test_legacy_bare_list_is_loaded(tmp_path):
+    path = tmp_path / "redaction_terms.json"
+    path.write_text(json.dumps(["Name", "MRN"]), encoding="utf-8")
+    store = ca.TermsStore(str(path))
+    assert store.load() == ["Name", "MRN"]
+    assert store.version == 0
+    assert store.languages == {}
+
+    store.save(["Name", "MRN", "DOB"])
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["version"] == 1
+    assert data["terms"] == ["Name", "MRN", "DOB"]
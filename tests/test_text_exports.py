@@ -0,0 +1,56 @@
+import importlib.util
+import io
+import os
+
+MODULE_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, "Code", "Clinical Anonymizer.py"
+)
+spec = importlib.util.spec_from_file_location("clinical_anonymizer", MODULE_PATH)
+ca = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ca)
+
+MATCHER = ca.TermMatcher(ca.KEY_VALUE_PAIRS, detect_language=False)
+
+TEXT = (
+    "Patient ID: 4711 seen on ward 3, Date of Birth: 01.01.1970\n"
+    "MSH|^~\\&|LAB|HOSP\rPID|1||Name|Date  of\tBirth|19700101|City\r\n"
+    "free text without identifiers " * 3 + "\n"
+    "update of birth records; Medical Record Number 55 and MRN:12\n"
+    "no trailing newline Geb. 1.1.70"
+)
+
+
+def stream(text, mode, limit, delimiter=None):
+    redactor = ca.TextRedactor(MATCHER, mode, delimiter)
+    out = io.StringIO()
+    lines = ca.redact_text_stream(io.StringIO(text), out, redactor, limit)
+    return out.getvalue(), redactor.redactions, lines
+
+
+def test_streamed_output_matches_one_shot_redaction():
+    for mode, delimiter in (("standard", None), ("aggressive", "|")):
+        redactor = ca.TextRedactor(MATCHER, mode, delimiter)
+        expected = redactor.redact(TEXT)
+        for limit in range(1, len(TEXT) + 2):
+            out, redactions, _lines = stream(TEXT, mode, limit, delimiter)
+            assert out == expected, (mode, limit)
+            assert redactions == redactor.redactions, (mode, limit)
+
+
+def test_long_lines_are_streamed_in_pieces():
+    text = ("x" * 50 + " Date of Birth: 1.1.70 ") * 40
+    expected = ca.TextRedactor(MATCHER, "aggressive").redact(text)
+    for limit in (7, 64, 333):
+        assert stream(text, "aggressive", limit)[0] == expected
+
+
+def test_hl7_segments_count_as_lines():
+    text = "MSH|a\rPID|b\rOBX|c\r\nMSH|d\r"
+    for limit in (1, 2, 3, 5, 100):
+        assert stream(text, "standard", limit)[2] == 4
+
+
+def test_redaction_matches_case_insensitive_pattern():
+    redactor = ca.TextRedactor(MATCHER, "standard")
+    for text in ("xName Name", "NAME:", "İstanbul Name", "Geb.Name", "surname"):
+        assert redactor.redact(text) == redactor.pattern.sub(ca.REDACTED_TEXT, text)